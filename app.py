@@ -2,33 +2,151 @@
 Automated SEO Reports — Streamlit frontend.
 Workflow: Form → PageSpeed Insights (+ optional Serper) → formatted report → new Google Doc.
 """
+import asyncio
+import functools
 import os
+import time
 from datetime import datetime
+from pathlib import Path
 from urllib.parse import urlparse
 
+import aiohttp
 import streamlit as st
 from dotenv import load_dotenv
 
-from seo_client import fetch_pagespeed, fetch_serper, build_report
-from google_docs_export import append_to_doc, create_new_doc, create_report_and_analysis_docs, HAS_GOOGLE
-from gemini_gap_analysis import get_gap_analysis
+from seo_client import fetch_pagespeed_async, fetch_serper_async, build_report, validate_url
 
 load_dotenv()
 
+CSS_PATH = Path(__file__).parent / "static" / "styles.css"
+# Joins the report and Gemini gap analysis for preview, download and append
+GAP_SECTION_SEPARATOR = "\n\n---\n\n## Gap Analysis (Gemini)\n\n"
+# Finished gap analyses, one file per report hash, so a repeat audit within a day doesn't call Gemini again
+GAP_CACHE_DIR = Path(__file__).resolve().parent / ".cache" / "gap"
+GAP_CACHE_MAX_ENTRIES = 256
+GAP_CACHE_TTL_SECONDS = 86400
+
+
+# Google Docs export and Gemini are optional and heavy to import; load them on first use only
+@functools.cache
+def _google():
+    import google_docs_export
+    return google_docs_export
+
+
+@functools.cache
+def _gemini():
+    import gemini_gap_analysis
+    return gemini_gap_analysis
+
+
+async def _gather_audit_data(calls: list[tuple[str, ...]], pagespeed_key: str, serper_key: str | None) -> list:
+    """
+    Run the given ("pagespeed", url, strategy) / ("serper", query) calls concurrently on one
+    session. Returns their results in order; a failed call comes back as its exception instead of raising.
+    """
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=8)) as session:
+        return await asyncio.gather(
+            *(
+                fetch_pagespeed_async(session, call[1], pagespeed_key, strategy=call[2])
+                if call[0] == "pagespeed"
+                else fetch_serper_async(session, call[1], serper_key)
+                for call in calls
+            ),
+            return_exceptions=True,
+        )
+
+
+class _CacheMiss(Exception):
+    """Raised by _cached_api_response on a lookup with nothing cached (exceptions are never memoized)."""
+
+
+@st.cache_data(ttl=900, max_entries=128, show_spinner=False)
+def _cached_api_response(call: tuple[str, ...], _response: dict | None = None) -> dict:
+    """
+    One cached PageSpeed or Serper response per call, i.e. per (url, strategy) or per SERP query.
+    Called without _response it is a lookup that raises _CacheMiss; called with it, it stores it.
+    """
+    if _response is None:
+        raise _CacheMiss
+    return _response
+
+
+def _fetch_audit_data(url: str, serper_query: str, pagespeed_key: str, serper_key: str | None) -> list:
+    """
+    Return [mobile, desktop, serper] for url (serper is None when serper_query is empty), fetching
+    only the calls that are not cached. Each successful response is cached on its own, so one failed
+    call never keeps the others out of the cache; failures come back as their exception.
+    """
+    calls = [("pagespeed", url, "mobile"), ("pagespeed", url, "desktop")]
+    if serper_query:
+        calls.append(("serper", serper_query))
+    results: list = [None, None, None]
+    missing = []
+    for i, call in enumerate(calls):
+        try:
+            results[i] = _cached_api_response(call)
+        except _CacheMiss:
+            missing.append(i)
+    if missing:
+        fetched = asyncio.run(_gather_audit_data([calls[i] for i in missing], pagespeed_key, serper_key))
+        for i, response in zip(missing, fetched):
+            results[i] = response
+            # fetch_serper_async returns None on failure; like exceptions, never cache it
+            if response is not None and not isinstance(response, Exception):
+                _cached_api_response(calls[i], response)
+    return results
+
+
+@st.cache_resource
+def _load_css() -> str:
+    """Read static/styles.css once per process."""
+    return "<style>" + CSS_PATH.read_text(encoding="utf-8") + "</style>"
+
+
+def _gap_cache_path(report_key: str) -> Path:
+    return GAP_CACHE_DIR / f"{report_key}.md"
+
+
+def _load_cached_gap(report_key: str) -> str | None:
+    """
+    Finished gap analysis saved for this report hash, or None on a miss. Entries expire
+    GAP_CACHE_TTL_SECONDS after they were written (mtime); a hit bumps atime for LRU eviction.
+    """
+    path = _gap_cache_path(report_key)
+    try:
+        mtime = path.stat().st_mtime
+        now = time.time()
+        if now - mtime > GAP_CACHE_TTL_SECONDS:
+            path.unlink(missing_ok=True)
+            return None
+        gap_md = path.read_text(encoding="utf-8") or None
+        os.utime(path, (now, mtime))
+        return gap_md
+    except OSError:
+        return None
+
+
+def _save_cached_gap(report_key: str, gap_md: str) -> None:
+    """Save a finished gap analysis, keeping only the GAP_CACHE_MAX_ENTRIES most recently used files."""
+    try:
+        GAP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _gap_cache_path(report_key).write_text(gap_md, encoding="utf-8")
+        cached = sorted(GAP_CACHE_DIR.glob("*.md"), key=lambda p: p.stat().st_atime, reverse=True)
+        for stale in cached[GAP_CACHE_MAX_ENTRIES:]:
+            stale.unlink(missing_ok=True)
+    except OSError:
+        # The cache only saves Gemini calls; never fail the audit over it
+        pass
+
+
 st.set_page_config(
     page_title="SEO Audit Report",
     page_icon="📊",
     layout="wide",
 )
 
-st.markdown("""
-<style>
-    .main .block-container { max-width: 900px; padding-top: 2rem; }
-    h1 { color: #1a1a2e; font-weight: 700; }
-    .stDownloadButton button { background: linear-gradient(90deg, #4361ee 0%, #3a0ca3 100%); color: white; }
-    div[data-testid="stExpander"] { border: 1px solid #e0e0e0; border-radius: 8px; }
-</style>
-""", unsafe_allow_html=True)
+st.html(_load_css())
 
 st.title("📊 Automated SEO Report")
 st.caption("Enter a URL to run a performance & SEO audit (PageSpeed Insights + optional Serper SERP data).")
@@ -37,6 +155,10 @@ pagespeed_key = os.environ.get("GOOGLE_PAGESPEED_API_KEY") or os.environ.get("PA
 serper_key = os.environ.get("SERPER_API_KEY") or st.secrets.get("SERPER_API_KEY")
 gemini_key = os.environ.get("GEMINI_API_KEY") or st.secrets.get("GEMINI_API_KEY")
 
+with st.sidebar:
+    if st.button("Clear cached API results", help="Drop cached PageSpeed / Serper responses (kept for 15 minutes)."):
+        _cached_api_response.clear()
+
 if not pagespeed_key:
     st.warning(
         "Set **GOOGLE_PAGESPEED_API_KEY** or **PAGESPEED_API_KEY** in `.env`. "
@@ -64,67 +186,113 @@ with st.form("seo_audit_form"):
         value=bool(gemini_key),
         help="Use Gemini to analyze the report and add key gaps, risks, and prioritized recommendations. Requires GEMINI_API_KEY.",
     )
+    regenerate_gap_analysis = st.checkbox(
+        "Force regenerate gap analysis",
+        value=False,
+        help="Gap analyses are cached per report; tick to ignore the cached result and call Gemini again.",
+    )
     submitted = st.form_submit_button("Run SEO Audit")
 
 if submitted and url:
+    # Validate before any PageSpeed / Serper quota is spent
+    normalized_url = validate_url(url)
+    if normalized_url is None:
+        st.error(f"“{url}” doesn't look like a valid website URL (e.g. https://example.com).")
+        st.stop()
+    url = normalized_url
     if not pagespeed_key:
         st.error("Please set GOOGLE_PAGESPEED_API_KEY (or PAGESPEED_API_KEY) to run the audit.")
     else:
-        with st.spinner("Running PageSpeed (mobile & desktop)…"):
-            try:
-                psi_mobile = fetch_pagespeed(url, pagespeed_key, strategy="mobile")
-            except Exception as e:
-                st.error(f"PageSpeed (mobile) failed: {e}")
-                psi_mobile = None
-            try:
-                psi_desktop = fetch_pagespeed(url, pagespeed_key, strategy="desktop")
-            except Exception as e:
-                st.warning(f"PageSpeed (desktop) failed: {e}")
-                psi_desktop = None
-        serper_data = None
-        actual_serper_query = (serper_query or urlparse(url).netloc or url).strip()
-        if include_serper and serper_key:
-            with st.spinner("Fetching SERP data…"):
-                serper_data = fetch_serper(actual_serper_query, serper_key)
-        if not psi_mobile and not psi_desktop:
-            st.error("Audit failed: no PageSpeed data.")
-        else:
-            report_md = build_report(
+        # One status container for the whole pipeline instead of a spinner per step. It collapses
+        # when done, so step failures are collected and shown below it rather than inside it.
+        problems: list[tuple[str, str]] = []
+        with st.status("Running audit…", expanded=True) as status:
+            actual_serper_query = (serper_query or urlparse(url).netloc or url).strip()
+            if include_serper and serper_key:
+                status.update(label="Running PageSpeed (mobile & desktop) and fetching SERP data…")
+            else:
+                status.update(label="Running PageSpeed (mobile & desktop)…")
+            results = _fetch_audit_data(
                 url,
-                pagespeed_mobile=psi_mobile,
-                pagespeed_desktop=psi_desktop,
-                serper_data=serper_data,
-                serper_query=actual_serper_query if serper_data else "",
+                actual_serper_query if include_serper and serper_key else "",
+                pagespeed_key,
+                serper_key,
             )
-            gap_md = None
-            if include_gap_analysis and gemini_key:
-                with st.spinner("Running Gemini gap analysis…"):
-                    gap_md, gap_err = get_gap_analysis(report_md, gemini_key)
-                    if not gap_md:
-                        st.warning(f"Gap analysis could not be generated. {gap_err or 'Gemini returned no content.'}")
-            # Keep full report (with gap section) for preview and download; store gap separately for two-doc export
-            report_with_gap = report_md + ("\n\n---\n\n## Gap Analysis (Gemini)\n\n" + gap_md if gap_md else "")
-            st.session_state["last_report"] = report_with_gap
-            st.session_state["last_url"] = url
-            st.session_state["last_gap_md"] = gap_md
-            # Create two separate Google Docs: report + gap analysis (or one doc if no gap)
-            if HAS_GOOGLE and report_md:
-                creds_path = os.environ.get("GOOGLE_CREDENTIALS_FILE") or "credentials.json"
-                domain = urlparse(url).netloc or url.replace("https://", "").replace("http://", "").split("/")[0] or "report"
-                date_str = datetime.now().strftime("%Y-%m-%d")
-                report_doc_id, analysis_doc_id, export_err = create_report_and_analysis_docs(
-                    domain, date_str, report_md, gap_md, creds_path
-                )
-                st.session_state["google_report_doc_id"] = report_doc_id
-                st.session_state["google_analysis_doc_id"] = analysis_doc_id
-                st.session_state["google_docs_export_error"] = export_err
+            psi_mobile, psi_desktop, serper_data = results
+            if isinstance(psi_mobile, Exception):
+                problems.append(("error", f"PageSpeed (mobile) failed: {psi_mobile}"))
+                psi_mobile = None
+            if isinstance(psi_desktop, Exception):
+                problems.append(("warning", f"PageSpeed (desktop) failed: {psi_desktop}"))
+                psi_desktop = None
+            if isinstance(serper_data, Exception):
+                serper_data = None
+            if not psi_mobile and not psi_desktop:
+                problems.append(("error", "Audit failed: no PageSpeed data."))
+                status.update(label="Audit failed", state="error", expanded=True)
             else:
-                st.session_state["google_report_doc_id"] = None
-                st.session_state["google_analysis_doc_id"] = None
-                st.session_state["google_docs_export_error"] = None
+                status.update(label="Building report…")
+                report_md = build_report(
+                    url,
+                    pagespeed_mobile=psi_mobile,
+                    pagespeed_desktop=psi_desktop,
+                    serper_data=serper_data,
+                    serper_query=actual_serper_query if serper_data else "",
+                )
+                gap_md = None
+                if include_gap_analysis and gemini_key:
+                    status.update(label="Running Gemini gap analysis…")
+                    # Render tokens as they arrive; the live preview is cleared once the full report shows below
+                    live_preview = st.empty()
+                    report_key = _gemini().report_hash(report_md)
+                    gap_md = None if regenerate_gap_analysis else _load_cached_gap(report_key)
+                    if gap_md is None:
+                        try:
+                            with live_preview.container():
+                                gap_md = st.write_stream(
+                                    _gemini().stream_gap_analysis(report_md, gemini_key)
+                                ).strip() or None
+                        except _gemini().GapAnalysisError as e:
+                            problems.append(("warning", f"Gap analysis could not be generated. {e}"))
+                        if gap_md:
+                            _save_cached_gap(report_key, gap_md)
+                    live_preview.empty()
+                # Store report and gap once; the results fragment joins them for preview and download
+                st.session_state["last_report_md"] = report_md
+                st.session_state["last_url"] = url
+                st.session_state["last_gap_md"] = gap_md
+                # Create two separate Google Docs: report + gap analysis (or one doc if no gap)
+                if report_md and _google().HAS_GOOGLE:
+                    status.update(label="Creating Google Docs…")
+                    creds_path = os.environ.get("GOOGLE_CREDENTIALS_FILE") or "credentials.json"
+                    domain = urlparse(url).netloc or url.replace("https://", "").replace("http://", "").split("/")[0] or "report"
+                    date_str = datetime.now().strftime("%Y-%m-%d")
+                    report_doc_id, analysis_doc_id, export_err = _google().create_report_and_analysis_docs(
+                        domain, date_str, report_md, gap_md, creds_path
+                    )
+                    st.session_state["google_report_doc_id"] = report_doc_id
+                    st.session_state["google_analysis_doc_id"] = analysis_doc_id
+                    st.session_state["google_docs_export_error"] = export_err
+                else:
+                    st.session_state["google_report_doc_id"] = None
+                    st.session_state["google_analysis_doc_id"] = None
+                    st.session_state["google_docs_export_error"] = None
+                status.update(
+                    label="Audit complete with warnings" if problems else "Audit complete",
+                    state="complete",
+                    expanded=False,
+                )
+        for level, message in problems:
+            (st.error if level == "error" else st.warning)(message)
+
 
-if st.session_state.get("last_report"):
-    report_md = st.session_state["last_report"]
+@st.fragment
+def _render_results() -> None:
+    """Results section; runs as a fragment so download/append interactions don't rerun the audit."""
+    report_md = st.session_state["last_report_md"]
+    gap_md = st.session_state.get("last_gap_md")
+    if gap_md:
+        report_md = report_md + GAP_SECTION_SEPARATOR + gap_md
     url_display = st.session_state.get("last_url", "")
 
     st.success(f"Report generated for **{url_display}**")
@@ -154,7 +322,7 @@ if st.session_state.get("last_report"):
     with st.expander("View full report", expanded=True):
         st.markdown(report_md)
 
-    if HAS_GOOGLE:
+    if _google().HAS_GOOGLE:
         st.markdown("---")
         st.caption("Optionally append this report to an existing Google Doc.")
         doc_id = st.text_input(
@@ -165,10 +333,14 @@ if st.session_state.get("last_report"):
         if doc_id.strip():
             creds_path = os.environ.get("GOOGLE_CREDENTIALS_FILE") or "credentials.json"
             if st.button("Append report to this Doc"):
-                err = append_to_doc(doc_id.strip(), st.session_state.get("last_report", report_md), creds_path)
+                err = _google().append_to_doc(doc_id.strip(), report_md, creds_path)
                 if err is None:
                     st.success("Report appended to the document.")
                 else:
                     st.error(f"Export failed: {err}")
     else:
         st.info("Install Google API packages and add credentials to enable Google Docs export.")
+
+
+if st.session_state.get("last_report_md"):
+    _render_results()
@@ -1,11 +1,25 @@
 """
 Gemini-powered gap analysis for SEO/performance reports.
 """
+import functools
+import hashlib
+from typing import Iterator
+
+import orjson
 import requests
 
+from seo_client import http_session
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
 # Gemini 2.5 Flash (Google AI Studio / generativelanguage.googleapis.com)
 GEMINI_MODEL = "gemini-2.5-flash"
-MAX_REPORT_CHARS = 28000  # Leave room for prompt and response
+MAX_REPORT_TOKENS = 24000  # Leave room for prompt and response
+MAX_REPORT_CHARS = 28000  # Fallback budget when tiktoken is unavailable
 
 GAP_ANALYSIS_PROMPT = """You are an expert SEO and web performance consultant. Analyze the following audit report in detail so the site owner can actually improve their website. Your response MUST be in Markdown and include these sections:
 
@@ -34,6 +48,15 @@ A short bullet list of “Do this first” items (3–5) so the owner can start
 Be detailed and specific so someone can use this document to improve the site. Do not repeat the raw report; only analyze and recommend."""
 
 
+GEMINI_BASE_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}"
+# GAP_ANALYSIS_PROMPT is sent inline: at roughly 400 tokens it is below the 1024-token minimum
+# Gemini 2.5 Flash needs for a cachedContents entry, so it cannot be cached server-side
+
+
+class GapAnalysisError(Exception):
+    """User-facing failure from stream_gap_analysis (same messages get_gap_analysis returns)."""
+
+
 def _extract_text(data: dict) -> str | None:
     """Extract generated text from Gemini API response."""
     candidates = data.get("candidates") or []
@@ -52,6 +75,15 @@ def _extract_text(data: dict) -> str | None:
     return text.strip() or None
 
 
+def _extract_chunk_text(data: dict) -> str:
+    """Extract the raw (unstripped) text of one streamed response chunk."""
+    candidates = data.get("candidates") or []
+    if not candidates:
+        return ""
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(p.get("text") or "" for p in parts if isinstance(p.get("text"), str))
+
+
 def _extract_error(data: dict, status_code: int, response_text: str) -> str:
     """Build a user-facing error message from response."""
     err = data.get("error")
@@ -75,17 +107,42 @@ def _extract_error(data: dict, status_code: int, response_text: str) -> str:
     return "No content in response."
 
 
-def get_gap_analysis(report_md: str, api_key: str) -> tuple[str | None, str | None]:
+@functools.cache
+def _token_encoding():
     """
-    Send the report to Gemini and return (gap_analysis_text, error_message).
-    On success: (text, None). On failure: (None, error_string).
+    cl100k_base BPE, loaded once (it may be downloaded on first use). It is not Gemini's own
+    tokenizer but tracks it closely enough for a budget. None if unavailable.
     """
-    if not api_key or not report_md:
-        return None, "Missing API key or report."
-    # Truncate to avoid token limits and timeouts
-    report_truncated = report_md[:MAX_REPORT_CHARS]
-    if len(report_md) > MAX_REPORT_CHARS:
-        report_truncated += "\n\n[... report truncated ...]"
+    if not HAS_TIKTOKEN:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def _truncate_report(report_md: str) -> str:
+    # Truncate by token count to avoid token limits and timeouts (fall back to characters)
+    enc = _token_encoding()
+    if enc is None:
+        report_truncated = report_md[:MAX_REPORT_CHARS]
+        if len(report_md) > MAX_REPORT_CHARS:
+            report_truncated += "\n\n[... report truncated ...]"
+        return report_truncated
+    tokens = enc.encode(report_md, disallowed_special=())
+    if len(tokens) <= MAX_REPORT_TOKENS:
+        return report_md
+    return enc.decode(tokens[:MAX_REPORT_TOKENS]) + "\n\n[... report truncated ...]"
+
+
+def report_hash(report_md: str) -> str:
+    """SHA-256 of what is actually sent to Gemini (model + truncated report), for use as a cache key."""
+    return hashlib.sha256(f"{GEMINI_MODEL}\n{_truncate_report(report_md)}".encode("utf-8")).hexdigest()
+
+
+def _build_payload(report_md: str) -> dict:
+    """Build the generateContent / streamGenerateContent request body for a report."""
+    report_truncated = _truncate_report(report_md)
     payload = {
         "contents": [{"parts": [{"text": GAP_ANALYSIS_PROMPT + "\n\n---\n\n" + report_truncated}]}],
         "generationConfig": {
@@ -93,10 +150,21 @@ def get_gap_analysis(report_md: str, api_key: str) -> tuple[str | None, str | No
             "maxOutputTokens": 8192,
         },
     }
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={api_key}"
+    return payload
+
+
+def get_gap_analysis(report_md: str, api_key: str) -> tuple[str | None, str | None]:
+    """
+    Send the report to Gemini and return (gap_analysis_text, error_message).
+    On success: (text, None). On failure: (None, error_string).
+    """
+    if not api_key or not report_md:
+        return None, "Missing API key or report."
+    payload = _build_payload(report_md)
+    url = f"{GEMINI_BASE_URL}:generateContent?key={api_key}"
     try:
-        response = requests.post(url, json=payload, timeout=90)
-        data = response.json() if response.text else {}
+        response = http_session().post(url, json=payload, timeout=90)
+        data = orjson.loads(response.content) if response.content else {}
         text = _extract_text(data)
         if text:
             return text, None
@@ -105,3 +173,45 @@ def get_gap_analysis(report_md: str, api_key: str) -> tuple[str | None, str | No
         return None, str(e)
     except Exception as e:
         return None, str(e)
+
+
+def stream_gap_analysis(report_md: str, api_key: str) -> Iterator[str]:
+    """
+    Stream the gap analysis from Gemini (streamGenerateContent over SSE), yielding text chunks
+    as they arrive so the UI can render them immediately (e.g. with st.write_stream).
+    Raises GapAnalysisError with a user-facing message on failure.
+    """
+    if not api_key or not report_md:
+        raise GapAnalysisError("Missing API key or report.")
+    payload = _build_payload(report_md)
+    url = f"{GEMINI_BASE_URL}:streamGenerateContent?alt=sse&key={api_key}"
+    try:
+        with http_session().post(url, json=payload, timeout=90, stream=True) as response:
+            # SSE has no charset in Content-Type; requests would otherwise assume ISO-8859-1
+            response.encoding = "utf-8"
+            if response.status_code != 200:
+                text = response.text or ""
+                try:
+                    data = orjson.loads(text) if text else {}
+                except ValueError:
+                    data = {}
+                if isinstance(data, list):
+                    data = data[0] if data else {}
+                raise GapAnalysisError(_extract_error(data, response.status_code, text))
+            last_data: dict = {}
+            got_text = False
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                try:
+                    last_data = orjson.loads(line[len("data:"):])
+                except ValueError as e:
+                    raise GapAnalysisError(f"Malformed streaming response from Gemini: {e}") from e
+                chunk = _extract_chunk_text(last_data)
+                if chunk:
+                    got_text = True
+                    yield chunk
+            if not got_text:
+                raise GapAnalysisError(_extract_error(last_data, response.status_code, ""))
+    except requests.exceptions.RequestException as e:
+        raise GapAnalysisError(str(e)) from e
@@ -4,27 +4,58 @@ Requires credentials.json (OAuth) in project root or path in GOOGLE_CREDENTIALS_
 Also supports Google Drive so docs can be stored in a specific folder.
 Supports Streamlit secrets: GOOGLE_CREDENTIALS_JSON and GOOGLE_TOKEN_JSON.
 """
+import datetime
+import io
 import os
+import random
 import re
-import json
-import tempfile
+import string
+import functools
+import importlib.util
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-try:
-    import streamlit as st
-    HAS_STREAMLIT = True
-except ImportError:
-    HAS_STREAMLIT = False
-
-try:
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-    from googleapiclient.discovery import build
-    from googleapiclient.errors import HttpError
-    HAS_GOOGLE = True
-except ImportError:
-    HAS_GOOGLE = False
+import orjson
+
+# Streamlit and the Google client libraries are imported on first use, not at module import:
+# they dominate cold start and most page loads / scheduled runs never export a doc.
+# The HAS_* flags only probe that the packages are installed.
+HAS_STREAMLIT = importlib.util.find_spec("streamlit") is not None
+HAS_GOOGLE = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("googleapiclient", "google_auth_oauthlib", "google_auth_httplib2", "httplib2")
+)
+
+
+@functools.cache
+def _lazy_streamlit() -> bool:
+    """Import streamlit into module globals on first call; returns HAS_STREAMLIT."""
+    global st, HAS_STREAMLIT
+    try:
+        import streamlit as st
+    except ImportError:
+        HAS_STREAMLIT = False
+    return HAS_STREAMLIT
+
+
+@functools.cache
+def _lazy_google() -> bool:
+    """Import the Google API client into module globals on first call; returns HAS_GOOGLE."""
+    global Credentials, InstalledAppFlow, Request, build, HttpError
+    global build_http, google_auth_httplib2, HAS_GOOGLE
+    try:
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+        from googleapiclient.discovery import build
+        from googleapiclient.errors import HttpError
+        from googleapiclient.http import build_http
+        import google_auth_httplib2
+    except ImportError:
+        HAS_GOOGLE = False
+    return HAS_GOOGLE
 
 # Docs + Drive so we can create a folder and move docs into it
 SCOPES = [
@@ -32,22 +63,45 @@ SCOPES = [
     "https://www.googleapis.com/auth/drive.file",
 ]
 
+# Markdown patterns, compiled once at import
+_RE_NUM = re.compile(r"^\d+\.\s+")
+# Bold (** / __) and code spans in one alternation, so a line is scanned once
+_RE_INLINE = re.compile(r"\*\*(.+?)\*\*|__(.+?)__|`([^`]+)`")
+# Everything _markdown_to_plain removes, in one alternation: bold, italic, code, leading #s
+_RE_ALL_MD = re.compile(
+    r"\*\*(.+?)\*\*|__(.+?)__|(?<!\*)\*([^*]+)\*(?!\*)|`([^`]+)`|^#+\s*", re.MULTILINE
+)
+# Anything the formatted builder would style: heading/emphasis/code markers, "- " bullets, "1. " items
+_MARKER_RE = re.compile(r"[#*_`]|^[ \t]*(?:-\s|\d+\.\s)", re.MULTILINE)
+
+
+# Refresh tokens this long before they expire, so a request never starts with a token about to lapse
+TOKEN_REFRESH_BUFFER_SECONDS = 300
+
+
+def _seconds_until_expiry(creds: "Credentials") -> float | None:
+    if creds.expiry is None:
+        return None
+    # google-auth keeps expiry as a naive UTC datetime
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return (creds.expiry - now).total_seconds()
+
 
 def _get_creds(credentials_path: str | None) -> "Credentials | None":
-    if not HAS_GOOGLE:
+    if not _lazy_google():
         return None
     
     # Check Streamlit secrets first
     credentials_json = None
     token_json = None
     secrets_error = None
-    if HAS_STREAMLIT:
+    if _lazy_streamlit():
         try:
             # Try to get from Streamlit secrets (can be dict or JSON string)
             creds_secret = st.secrets.get("GOOGLE_CREDENTIALS_JSON")
             if creds_secret:
                 if isinstance(creds_secret, dict):
-                    credentials_json = json.dumps(creds_secret)
+                    credentials_json = creds_secret
                 elif isinstance(creds_secret, str):
                     credentials_json = creds_secret
             else:
@@ -56,7 +110,7 @@ def _get_creds(credentials_path: str | None) -> "Credentials | None":
             token_secret = st.secrets.get("GOOGLE_TOKEN_JSON")
             if token_secret:
                 if isinstance(token_secret, dict):
-                    token_json = json.dumps(token_secret)
+                    token_json = token_secret  # from_authorized_user_info takes the dict as-is
                 elif isinstance(token_secret, str):
                     token_json = token_secret
             else:
@@ -70,7 +124,7 @@ def _get_creds(credentials_path: str | None) -> "Credentials | None":
     # If we have token from secrets, use it directly (for Streamlit Cloud)
     if token_json:
         try:
-            token_data = json.loads(token_json) if isinstance(token_json, str) else token_json
+            token_data = orjson.loads(token_json) if isinstance(token_json, str) else token_json
             creds = Credentials.from_authorized_user_info(token_data, SCOPES)
             if creds.expired and creds.refresh_token:
                 creds.refresh(Request())
@@ -84,8 +138,7 @@ def _get_creds(credentials_path: str | None) -> "Credentials | None":
     if not credentials_json:
         path = Path(credentials_path or "credentials.json")
         if path.exists():
-            with open(path, "r") as f:
-                credentials_json = f.read()
+            credentials_json = path.read_bytes()
         else:
             # Return helpful error message
             error_msg = "No Google credentials found. "
@@ -109,131 +162,372 @@ def _get_creds(credentials_path: str | None) -> "Credentials | None":
         except Exception:
             pass
     
-    # Create temp file for credentials if from secrets
-    temp_creds_file = None
-    if not path and credentials_json:
-        temp_creds = tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False)
-        temp_creds.write(credentials_json)
-        temp_creds.close()
-        temp_creds_file = Path(temp_creds.name)
-        path = temp_creds_file
-    
-    try:
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                # OAuth flow (only works locally, not in Streamlit Cloud)
-                if not path:
-                    return None
-                flow = InstalledAppFlow.from_client_secrets_file(str(path), SCOPES)
-                # Use fixed port 8080 for consistent redirect URI
-                # Make sure http://localhost:8080/ and http://127.0.0.1:8080/ are added to 
-                # Authorized redirect URIs in Google Cloud Console
-                try:
-                    creds = flow.run_local_server(port=8080)
-                except OSError:
-                    # Port 8080 might be in use, try random port as fallback
-                    creds = flow.run_local_server(port=0)
-            # Save token if we have a valid path
-            if token_path and creds:
-                with open(token_path, "w") as f:
-                    f.write(creds.to_json())
-    finally:
-        # Clean up temp files
-        if temp_creds_file and temp_creds_file.exists():
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            # OAuth flow (only works locally, not in Streamlit Cloud)
+            if not credentials_json:
+                return None
+            # Build the flow straight from the in-memory client config (no temp file round trip)
+            config = orjson.loads(credentials_json) if isinstance(credentials_json, (str, bytes)) else credentials_json
+            flow = InstalledAppFlow.from_client_config(config, SCOPES)
+            # Use fixed port 8080 for consistent redirect URI
+            # Make sure http://localhost:8080/ and http://127.0.0.1:8080/ are added to 
+            # Authorized redirect URIs in Google Cloud Console
             try:
-                temp_creds_file.unlink()
-            except Exception:
-                pass
+                creds = flow.run_local_server(port=8080)
+            except OSError:
+                # Port 8080 might be in use, try random port as fallback
+                creds = flow.run_local_server(port=0)
+        # Save token if we have a valid path
+        if token_path and creds:
+            with open(token_path, "w") as f:
+                f.write(creds.to_json())
     
     return creds
 
 
-def _ensure_doc_in_folder(creds: "Credentials", document_id: str) -> None:
+def _cache_resource(func):
+    """
+    st.cache_resource when Streamlit is available, otherwise a per-process lru_cache.
+    The choice is made on first call so decorating doesn't import streamlit.
+    """
+    cached = None
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        nonlocal cached
+        if cached is None:
+            if _lazy_streamlit():
+                cached = st.cache_resource(show_spinner=False)(func)
+            else:
+                cached = functools.lru_cache(maxsize=None)(func)
+        return cached(*args)
+
+    return wrapper
+
+
+class _PooledHttp:
+    """
+    httplib2-compatible transport shared by the Docs and Drive services and all threads.
+    httplib2.Http is not thread-safe, so each request borrows an authorized Http from a small
+    LIFO pool and hands it back; its keep-alive connections then outlive the thread that
+    opened them (Streamlit runs every rerun on a new thread).
+    """
+
+    def __init__(self, creds: "Credentials", max_idle: int = 8):
+        self.credentials = creds  # read by googleapiclient to refresh tokens inside batches
+        self._idle: list = []
+        self._lock = threading.Lock()
+        self._max_idle = max_idle
+        self._refresh_lock = threading.Lock()
+        # time.monotonic() until which the token needs no expiry check; 0.0 checks on first use
+        self._fresh_until = 0.0
+
+    def _refresh_ahead(self) -> None:
+        """Refresh the token once it is within TOKEN_REFRESH_BUFFER_SECONDS of expiring."""
+        if time.monotonic() < self._fresh_until:
+            return
+        with self._refresh_lock:
+            if time.monotonic() < self._fresh_until:
+                return
+            creds = self.credentials
+            remaining = _seconds_until_expiry(creds)
+            if creds.refresh_token and (remaining is None or remaining < TOKEN_REFRESH_BUFFER_SECONDS):
+                try:
+                    creds.refresh(Request())
+                except Exception:
+                    if not creds.valid:
+                        raise
+                    # Current token still works; try refreshing again on the next request
+                remaining = _seconds_until_expiry(creds)
+            if remaining is not None:
+                self._fresh_until = time.monotonic() + max(0.0, remaining - TOKEN_REFRESH_BUFFER_SECONDS)
+
+    def request(self, *args, **kwargs):
+        self._refresh_ahead()
+        with self._lock:
+            http = self._idle.pop() if self._idle else None
+        if http is None:
+            # build_http: the client library's 60 s socket timeout, and 308 is not followed as a redirect
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=build_http())
+        try:
+            return http.request(*args, **kwargs)
+        finally:
+            with self._lock:
+                if len(self._idle) < self._max_idle:
+                    self._idle.append(http)
+
+
+@_cache_resource
+def get_google_services(credentials_path: str | None):
+    """
+    Return (docs_service, drive_service) built once per credentials path and reused across
+    reruns and sessions. Raises if credentials cannot be loaded, so failures are not cached.
+    Tokens are refreshed by the pooled transport shortly before they expire.
+    """
+    creds = _get_creds(credentials_path)
+    if not creds:
+        raise Exception("No Google credentials (credentials.json not found or invalid)")
+    http = _PooledHttp(creds)
+    docs_service = build("docs", "v1", http=http, cache_discovery=False)
+    drive_service = build("drive", "v3", http=http, cache_discovery=False)
+    return docs_service, drive_service
+
+
+# Docs/Drive allow roughly 10 writes/s per user; stay under it instead of collecting 429 backoffs
+API_REQUESTS_PER_SECOND = 8
+API_RETRY_STATUSES = (429, 500, 503)
+API_MAX_ATTEMPTS = 3
+API_BACKOFF_MAX = 16.0
+
+
+class _RateLimiter:
+    """Space API calls at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1) -> None:
+        """Reserve n consecutive slots (one per sub-request of a batch) and wait for the first."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + n * self._interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_RATE_LIMIT = _RateLimiter(API_REQUESTS_PER_SECOND)
+
+
+def _retry_delay(attempt: int, error: Exception) -> float | None:
+    """Seconds before retrying after error (Retry-After if sent, else 2**attempt); None if not retryable."""
+    resp = getattr(error, "resp", None)
+    if not isinstance(error, HttpError) or resp is None or resp.status not in API_RETRY_STATUSES:
+        return None
+    try:
+        return min(max(float(resp.get("retry-after")), 0.0), API_BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return min(2.0 ** attempt + random.uniform(0, 1), API_BACKOFF_MAX)
+
+
+def _execute(request):
+    """request.execute() behind the rate limiter, retrying 429/500/503 with backoff."""
+    for attempt in range(API_MAX_ATTEMPTS):
+        _RATE_LIMIT.acquire()
+        try:
+            return request.execute()
+        except Exception as e:
+            delay = _retry_delay(attempt, e)
+            if delay is None or attempt + 1 == API_MAX_ATTEMPTS:
+                raise
+        time.sleep(delay)
+
+
+# (id(drive_service), folder_name) -> Drive folder id, so the folder is looked up once per process
+_FOLDER_ID_CACHE: dict[tuple[int, str], str] = {}
+
+
+def _drive_folder_name() -> str:
+    return os.environ.get("GOOGLE_DRIVE_FOLDER_NAME") or "SEO Health Checker"
+
+
+def _get_folder_id(drive_service, folder_name: str) -> str | None:
+    """Find or create the Drive folder named folder_name; the id is cached per process."""
+    cache_key = (id(drive_service), folder_name)
+    folder_id = _FOLDER_ID_CACHE.get(cache_key)
+    if folder_id:
+        return folder_id
+    # Search for the folder (not in trash). Drive query strings escape \ and ' with a backslash.
+    # With the drive.file scope only folders this app created are visible, all in My Drive root,
+    # so the oldest match is the one to reuse.
+    escaped = folder_name.replace("\\", "\\\\").replace("'", "\\'")
+    query = (
+        "mimeType = 'application/vnd.google-apps.folder' "
+        f"and name = '{escaped}' and trashed = false"
+    )
+    res = _execute(drive_service.files().list(
+        q=query, pageSize=1, orderBy="createdTime", fields="files(id)"
+    ))
+    files = res.get("files") or []
+    if files:
+        folder_id = files[0]["id"]
+
+    # Create folder if it doesn't exist
+    if not folder_id:
+        meta = {
+            "name": folder_name,
+            "mimeType": "application/vnd.google-apps.folder",
+        }
+        folder = _execute(drive_service.files().create(
+            body=meta, fields="id"
+        ))
+        folder_id = folder.get("id")
+
+    if folder_id:
+        _FOLDER_ID_CACHE[cache_key] = folder_id
+    return folder_id
+
+
+def _ensure_doc_in_folder(drive_service, document_id: str, known_no_parents: bool = False) -> None:
     """
     Ensure the given Doc is inside the Drive folder defined by GOOGLE_DRIVE_FOLDER_NAME
     (default: SEO Health Checker). Creates the folder on first run if it doesn't exist.
+    known_no_parents: the doc was just created, so it can't be in the folder yet (skips the parents check).
     """
-    folder_name = os.environ.get("GOOGLE_DRIVE_FOLDER_NAME") or "SEO Health Checker"
+    folder_name = _drive_folder_name()
     if not folder_name:
         return
     try:
-        drive_service = build("drive", "v3", credentials=creds)
-        # Find or create folder
-        # Search for folder in root (not in trash)
-        query = (
-            "mimeType = 'application/vnd.google-apps.folder' "
-            f"and name = '{folder_name}' and trashed = false"
-        )
-        res = drive_service.files().list(
-            q=query, pageSize=10, fields="files(id, name, parents)"
-        ).execute()
-        files = res.get("files") or []
-        
-        # Prefer folder in root (no parents) or use first match
-        folder_id = None
-        for f in files:
-            parents = f.get("parents") or []
-            if not parents:  # Root folder
-                folder_id = f["id"]
-                break
-        if not folder_id and files:
-            folder_id = files[0]["id"]  # Use first match if no root folder found
-        
-        # Create folder if it doesn't exist
-        if not folder_id:
-            meta = {
-                "name": folder_name,
-                "mimeType": "application/vnd.google-apps.folder",
-            }
-            folder = drive_service.files().create(
-                body=meta, fields="id"
-            ).execute()
-            folder_id = folder.get("id")
-        
+        folder_id = _get_folder_id(drive_service, folder_name)
         if not folder_id:
             return
-        
-        # Add doc to folder (ensures it appears in the folder)
-        # Check if doc is already in the folder
-        doc = drive_service.files().get(fileId=document_id, fields="parents").execute()
-        current_parents = doc.get("parents") or []
-        
-        if folder_id not in current_parents:
-            # Add folder as parent - doc will appear in the folder
-            drive_service.files().update(
-                fileId=document_id,
-                addParents=folder_id,
-                fields="id, parents",
-            ).execute()
+
+        # Move doc into folder (Drive allows a single parent, so the current one is removed)
+        # A new doc sits in My Drive root; otherwise check which parents it has first
+        remove_parents = "root"
+        if not known_no_parents:
+            doc = _execute(drive_service.files().get(fileId=document_id, fields="parents"))
+            parents = doc.get("parents") or []
+            if folder_id in parents:
+                return
+            remove_parents = ",".join(parents)
+
+        _execute(drive_service.files().update(
+            fileId=document_id,
+            addParents=folder_id,
+            removeParents=remove_parents,
+            fields="id, parents",
+        ))
     except Exception as e:
         # Folder placement is best-effort; ignore failures so report creation still works.
-        # Log error for debugging but don't fail the doc creation
+        # Forget the cached folder in case it was deleted, and log for debugging
+        _FOLDER_ID_CACHE.pop((id(drive_service), folder_name), None)
         import sys
         print(f"Warning: Could not move doc to Drive folder '{folder_name}': {e}", file=sys.stderr)
         return
 
 
+def _move_new_docs_to_folder(drive_service, document_ids: list[str]) -> None:
+    """Best-effort: move freshly created docs from My Drive root into the Drive folder with one batched update."""
+    folder_name = _drive_folder_name()
+    if not folder_name or not document_ids:
+        return
+    try:
+        folder_id = _get_folder_id(drive_service, folder_name)
+        if not folder_id:
+            return
+        _, errors = _execute_batch(drive_service, {
+            doc_id: drive_service.files().update(
+                fileId=doc_id, addParents=folder_id, removeParents="root", fields="id, parents"
+            )
+            for doc_id in document_ids
+        })
+        if errors:
+            raise next(iter(errors.values()))
+    except Exception as e:
+        _FOLDER_ID_CACHE.pop((id(drive_service), folder_name), None)
+        import sys
+        print(f"Warning: Could not move doc to Drive folder '{folder_name}': {e}", file=sys.stderr)
+
+
+def _execute_batch(service, calls: dict) -> tuple[dict[str, dict], dict[str, Exception]]:
+    """
+    Send independent API calls as one BatchHttpRequest (one HTTP round trip).
+    calls maps request_id -> HttpRequest; returns (responses, errors) keyed by request_id.
+    Sub-requests failing with a retryable status are resent in a smaller batch after a backoff.
+    """
+    responses: dict[str, dict] = {}
+    errors: dict[str, Exception] = {}
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = exception
+        else:
+            responses[request_id] = response
+
+    def send(pending: dict) -> None:
+        # The batch call itself can be throttled (429/503 for the whole request); retry it like _execute
+        for attempt in range(API_MAX_ATTEMPTS):
+            batch = service.new_batch_http_request(callback=callback)
+            for request_id, request in pending.items():
+                batch.add(request, request_id=request_id)
+            # Each sub-request counts against the quota, so it takes its own rate-limit slot
+            _RATE_LIMIT.acquire(len(pending))
+            try:
+                return batch.execute()
+            except Exception as e:
+                delay = _retry_delay(attempt, e)
+                if delay is None or attempt + 1 == API_MAX_ATTEMPTS:
+                    raise
+            time.sleep(delay)
+
+    pending = dict(calls)
+    for attempt in range(API_MAX_ATTEMPTS):
+        send(pending)
+        # Resend only the sub-requests that were throttled or hit a transient server error
+        delays = {rid: _retry_delay(attempt, errors[rid]) for rid in pending if rid in errors}
+        pending = {rid: calls[rid] for rid, delay in delays.items() if delay is not None}
+        if not pending or attempt + 1 == API_MAX_ATTEMPTS:
+            break
+        for rid in pending:
+            del errors[rid]
+        time.sleep(max(delays[rid] for rid in pending))
+    return responses, errors
+
+
+def _plain_repl(m: re.Match) -> str:
+    # Bold/italic text is re-scanned for nested markers (e.g. **Use `gzip`**); code spans are kept
+    # literally; the heading alternative has no group and is dropped
+    inner = m.group(1) or m.group(2) or m.group(3)
+    if inner:
+        return _RE_ALL_MD.sub(_plain_repl, inner) if "*" in inner or "_" in inner or "`" in inner else inner
+    return m.group(4) or ""
+
+
 def _markdown_to_plain(text: str) -> str:
     """Convert markdown to plain text so ** and ### etc. don't appear in Google Docs."""
     if not text:
         return text
-    text = text.replace("\r", "")
-    text = re.sub(r"\*\*(.+?)\*\*", r"\1", text)
-    text = re.sub(r"__(.+?)__", r"\1", text)
-    text = re.sub(r"(?<!\*)\*([^*]+)\*(?!\*)", r"\1", text)
-    text = re.sub(r"^#+\s*", "", text, flags=re.MULTILINE)
-    text = re.sub(r"`([^`]+)`", r"\1", text)
-    return text
+    return _RE_ALL_MD.sub(_plain_repl, text.replace("\r", ""))
+
+
+def _inline_repl(m: re.Match) -> str:
+    # Re-scan the inner text so nested markers (e.g. **Use `gzip`**) are stripped as well
+    return _RE_INLINE.sub(_inline_repl, m.group(1) or m.group(2) or m.group(3))
 
 
 def _strip_inline_markdown(line: str) -> str:
     """Remove ** and ` from a single line for display."""
-    line = re.sub(r"\*\*(.+?)\*\*", r"\1", line)
-    line = re.sub(r"__(.+?)__", r"\1", line)
-    line = re.sub(r"`([^`]+)`", r"\1", line)
-    return line.strip()
+    return _RE_INLINE.sub(_inline_repl, line).strip()
+
+
+@functools.lru_cache(maxsize=4096)
+def _md_line_to_block(line: str) -> tuple[str, str] | None:
+    """
+    Classify one non-blank markdown line: (display_text, block_type) for headings and list items,
+    None for paragraph text. Memoized because report lines (audit titles, section headings) repeat.
+    """
+    s = line.lstrip()
+    # Dispatch on the first character; a regex only runs for lines starting with a digit
+    c0 = s[0]
+    if c0 == "#":
+        hashes = len(s) - len(s.lstrip("#"))
+        if hashes <= 6 and s[hashes:hashes + 1].isspace():
+            # ### and deeper -> subheading
+            return _strip_inline_markdown(s[hashes:]), "subheading" if hashes >= 3 else "heading"
+        return None
+    stripped = s.rstrip()
+    if c0 in "-*" and stripped[1:2].isspace():
+        return _strip_inline_markdown(stripped[1:]), "bullet"
+    if c0.isdigit() and _RE_NUM.match(stripped):
+        # Keep "1. " prefix so the doc shows numbering as plain text
+        return _strip_inline_markdown(stripped), "numbered"
+    return None
 
 
 def _parse_markdown_blocks(md: str) -> list[tuple[str, str]]:
@@ -245,50 +539,32 @@ def _parse_markdown_blocks(md: str) -> list[tuple[str, str]]:
         return []
     md = md.replace("\r", "")
     segments = []
-    lines = md.split("\n")
-    i = 0
-    while i < len(lines):
-        line = lines[i]
+    # Paragraph: can span multiple lines until blank or next special line; buffered with spaces between
+    para = None
+    for line in md.split("\n"):
         stripped = line.strip()
-        if not stripped:
-            i += 1
-            continue
-        if re.match(r"^###\s", line) or re.match(r"^###\s", stripped):
-            segments.append((_strip_inline_markdown(re.sub(r"^#+\s*", "", stripped)), "subheading"))
-            i += 1
-            continue
-        if re.match(r"^##\s", line) or re.match(r"^##\s", stripped):
-            segments.append((_strip_inline_markdown(re.sub(r"^#+\s*", "", stripped)), "heading"))
-            i += 1
-            continue
-        if re.match(r"^#\s", line) or re.match(r"^#\s", stripped):
-            segments.append((_strip_inline_markdown(re.sub(r"^#+\s*", "", stripped)), "heading"))
-            i += 1
-            continue
-        if re.match(r"^[-*]\s+", stripped) or (stripped.startswith("- ") or stripped.startswith("* ")):
-            text = _strip_inline_markdown(re.sub(r"^[-*]\s+", "", stripped, count=1))
-            segments.append((text, "bullet"))
-            i += 1
-            continue
-        if re.match(r"^\d+\.\s+", stripped):
-            # Keep "1. " prefix so the doc shows numbering as plain text
-            text = _strip_inline_markdown(stripped)
-            segments.append((text, "numbered"))
-            i += 1
+        block = _md_line_to_block(line) if stripped else None
+        if block is None and stripped:
+            if para is None:
+                para = io.StringIO()
+            else:
+                para.write(" ")
+            para.write(stripped)
             continue
-        # Paragraph: can span multiple lines until blank or next special line
-        para_lines = [stripped]
-        i += 1
-        while i < len(lines) and lines[i].strip():
-            next_line = lines[i].strip()
-            if re.match(r"^#+\s", next_line) or re.match(r"^[-*]\s+", next_line) or re.match(r"^\d+\.\s+", next_line):
-                break
-            para_lines.append(next_line)
-            i += 1
-        segments.append((_strip_inline_markdown(" ".join(para_lines)), "paragraph"))
+        if para is not None:
+            segments.append((_strip_inline_markdown(para.getvalue()), "paragraph"))
+            para = None
+        if block is not None:
+            segments.append(block)
+    if para is not None:
+        segments.append((_strip_inline_markdown(para.getvalue()), "paragraph"))
     return segments
 
 
+# Block types rendered as consecutive lines (single newline between items)
+_LIST_TYPES = frozenset(("bullet", "numbered"))
+
+
 def _build_formatted_doc_requests(md: str) -> tuple[str, list[dict]]:
     """
     Build (full_plain_text, batchUpdate requests) for a formatted Google Doc.
@@ -297,69 +573,94 @@ def _build_formatted_doc_requests(md: str) -> tuple[str, list[dict]]:
     segments = _parse_markdown_blocks(md)
     if not segments:
         return "", []
+    if len(segments) == 1 and segments[0][1] == "paragraph":
+        text = segments[0][0]
+        return text, [{"insertText": {"location": {"index": 1}, "text": text}}]
 
-    parts = []
-    ranges_bold = []  # (start, end)
-    ranges_bullet = []  # (start, end)
+    buf = io.StringIO()
+    insert = {"location": {"index": 1}, "text": ""}
+    requests = [{"insertText": insert}]
     pos = 1  # Docs indices are 1-based
+    prev_is_list = False
+    bullet_range = None  # range of the current run of consecutive bullets
+    bullet_open = False  # previous segment was a bullet whose trailing newline isn't decided yet
 
-    for j, (text, block_type) in enumerate(segments):
-        if not text:
-            continue
-        if parts:
-            if block_type in ("bullet", "numbered") and segments[j - 1][1] in ("bullet", "numbered"):
-                sep = "\n"
-            else:
-                sep = "\n\n"
-            parts.append(sep)
-            pos += len(sep)
-        start = pos
-        parts.append(text)
-        pos += len(text)
-        end = pos
+    for text, block_type in segments:
+        is_list = block_type in _LIST_TYPES
         # List item paragraph includes the following newline for Docs API. Numbered items stay as plain paragraphs (no valid numbered preset in API).
-        if block_type == "bullet":
-            if j + 1 < len(segments) and segments[j + 1][1] in ("bullet", "numbered"):
-                end_para = end + 1  # include \n
-            else:
-                end_para = end
-            ranges_bullet.append((start, end_para))
-        elif block_type in ("heading", "subheading"):
-            ranges_bold.append((start, end))
-
-    full_text = "".join(parts)
-    requests = [{"insertText": {"location": {"index": 1}, "text": full_text}}]
-    for start, end in ranges_bold:
-        requests.append({
-            "updateTextStyle": {
-                "range": {"startIndex": start, "endIndex": end},
-                "textStyle": {"bold": True},
-                "fields": "bold",
-            }
-        })
-    for start, end in ranges_bullet:
-        requests.append({
-            "createParagraphBullets": {
-                "range": {"startIndex": start, "endIndex": end},
-                "bulletPreset": "BULLET_DISC_CIRCLE_SQUARE",
-            }
-        })
+        if bullet_open:
+            if is_list:
+                bullet_range["endIndex"] += 1  # include \n
+            bullet_open = False
+        if text:
+            if pos > 1:
+                sep = "\n" if is_list and prev_is_list else "\n\n"
+                buf.write(sep)
+                pos += len(sep)
+            start = pos
+            buf.write(text)
+            pos += len(text)
+            if block_type == "bullet":
+                bullet_open = True
+                if bullet_range is not None and bullet_range["endIndex"] == start:
+                    # Adjacent to the previous bullet: extend its range instead of adding a request
+                    bullet_range["endIndex"] = pos
+                else:
+                    bullet_range = {"startIndex": start, "endIndex": pos}
+                    requests.append({
+                        "createParagraphBullets": {
+                            "range": bullet_range,
+                            "bulletPreset": "BULLET_DISC_CIRCLE_SQUARE",
+                        }
+                    })
+            elif block_type in ("heading", "subheading"):
+                requests.append({
+                    "updateTextStyle": {
+                        "range": {"startIndex": start, "endIndex": pos},
+                        "textStyle": {"bold": True},
+                        "fields": "bold",
+                    }
+                })
+        prev_is_list = is_list
+
+    full_text = insert["text"] = buf.getvalue()
     return full_text, requests
 
 
+_DOC_ID_CHARS = string.ascii_letters + string.digits + "_-"
+_DOC_PATH = "/document/d/"
+
+
 def _extract_doc_id(value: str) -> str | None:
     """Extract Google Doc ID from full URL or return as-is if already an ID."""
     value = value.strip()
-    # Match .../d/DOCUMENT_ID/... or .../d/DOCUMENT_ID?...
-    m = re.search(r"/document/d/([a-zA-Z0-9_-]+)", value)
-    if m:
-        return m.group(1)
-    # If it looks like a raw ID (alphanumeric, hyphens, underscores, no slashes)
-    if re.match(r"^[a-zA-Z0-9_-]+$", value):
+    # If it looks like a raw ID (alphanumeric, hyphens, underscores, no slashes); checked first as
+    # the common programmatic case, and a raw ID can't contain the URL path anyway
+    if value and not value.strip(_DOC_ID_CHARS):
         return value
+    # Match .../d/DOCUMENT_ID/... or .../d/DOCUMENT_ID?...: the ID is the run of ID characters after the path
+    idx = value.find(_DOC_PATH)
+    while idx >= 0:
+        rest = value[idx + len(_DOC_PATH):]
+        n = len(rest) - len(rest.lstrip(_DOC_ID_CHARS))
+        if n:
+            return rest[:n]
+        idx = value.find(_DOC_PATH, idx + 1)
     return None
 
 
+def _doc_content_requests(markdown_text: str, formatted: bool = True) -> list[dict]:
+    """batchUpdate requests that write markdown_text into an empty doc (text + all styling)."""
+    doc_requests = None
+    # Text without any markdown markers has nothing to style: skip the parse and insert it as-is
+    if formatted and _MARKER_RE.search(markdown_text):
+        _, doc_requests = _build_formatted_doc_requests(markdown_text)
+    if not doc_requests:
+        text = _markdown_to_plain(markdown_text)
+        doc_requests = [{"insertText": {"location": {"index": 1}, "text": text}}]
+    return doc_requests
+
+
 def create_new_doc(
     title: str, markdown_text: str, credentials_path: str | None, *, formatted: bool = True
 ) -> tuple[str | None, str | None]:
@@ -368,36 +669,24 @@ def create_new_doc(
     If formatted=True (default), applies spacing, bold headings, and bullet/numbered lists.
     Returns (document_id, None) on success, or (None, error_message) on failure.
     """
-    if not HAS_GOOGLE:
+    if not _lazy_google():
         return None, "Google API libraries not installed"
     try:
-        creds = _get_creds(credentials_path)
+        docs_service, drive_service = get_google_services(credentials_path)
     except Exception as e:
         return None, str(e)
-    if not creds:
-        return None, "No Google credentials (credentials.json not found or invalid)"
     try:
-        docs_service = build("docs", "v1", credentials=creds)
         # Create the empty doc
-        doc = docs_service.documents().create(body={"title": title}).execute()
+        doc = _execute(docs_service.documents().create(body={"title": title}))
         document_id = doc.get("documentId")
         if not document_id:
             return None, "Created doc but no documentId returned"
         # Move into Drive folder (creates folder first time if needed)
-        _ensure_doc_in_folder(creds, document_id)
-        # Insert formatted content
-        if formatted and markdown_text.strip():
-            _, fmt_requests = _build_formatted_doc_requests(markdown_text)
-            if fmt_requests:
-                docs_service.documents().batchUpdate(
-                    documentId=document_id, body={"requests": fmt_requests}
-                ).execute()
-                return document_id, None
-        text = _markdown_to_plain(markdown_text)
-        docs_service.documents().batchUpdate(
-            documentId=document_id,
-            body={"requests": [{"insertText": {"location": {"index": 1}, "text": text}}]},
-        ).execute()
+        _ensure_doc_in_folder(drive_service, document_id, known_no_parents=True)
+        # Insert content (text + all styling) in a single batchUpdate
+        _execute(docs_service.documents().batchUpdate(
+            documentId=document_id, body={"requests": _doc_content_requests(markdown_text, formatted)}
+        ))
         return document_id, None
     except HttpError as e:
         return None, str(e)
@@ -416,27 +705,48 @@ def create_report_and_analysis_docs(
     Create two separate Google Docs: one for the SEO report, one for Gemini gap analysis.
     Returns (report_doc_id, analysis_doc_id, error). analysis_doc_id is None if gap_md is empty.
     """
-    if not HAS_GOOGLE:
+    if not _lazy_google():
         return None, None, "Google API libraries not installed"
     try:
-        creds = _get_creds(credentials_path)
+        docs_service, drive_service = get_google_services(credentials_path)
     except Exception as e:
         return None, None, str(e)
-    if not creds:
-        return None, None, "No Google credentials (credentials.json not found or invalid)"
-    report_id, err = create_new_doc(
-        f"SEO Report - {domain} - {date_str}", report_md, credentials_path
-    )
-    if err:
-        return None, None, err
-    analysis_id = None
+    docs = {"report": (f"SEO Report - {domain} - {date_str}", report_md)}
     if gap_md and gap_md.strip():
-        analysis_id, err2 = create_new_doc(
-            f"SEO Gap Analysis - {domain} - {date_str}", gap_md.strip(), credentials_path
-        )
-        if err2:
-            return report_id, None, err2  # report succeeded, analysis failed
-    return report_id, analysis_id, None
+        docs["analysis"] = (f"SEO Gap Analysis - {domain} - {date_str}", gap_md.strip())
+    try:
+        # Both docs go through the same batched round trips: create, then fill + move to folder
+        created, errors = _execute_batch(docs_service, {
+            key: docs_service.documents().create(body={"title": title}) for key, (title, _) in docs.items()
+        })
+        doc_ids = {key: r["documentId"] for key, r in created.items() if r.get("documentId")}
+        if "report" not in doc_ids:
+            # Without the report the analysis doc is an orphan: don't fill or file it, delete it
+            for doc_id in doc_ids.values():
+                try:
+                    _execute(drive_service.files().delete(fileId=doc_id))
+                except Exception:
+                    pass
+            return None, None, str(errors.get("report") or "Created doc but no documentId returned")
+        # Filling the docs and moving them into the folder are independent: overlap the two round trips
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            move = executor.submit(_move_new_docs_to_folder, drive_service, list(doc_ids.values()))
+            _, fill_errors = _execute_batch(docs_service, {
+                key: docs_service.documents().batchUpdate(
+                    documentId=doc_id, body={"requests": _doc_content_requests(docs[key][1])}
+                )
+                for key, doc_id in doc_ids.items()
+            })
+            move.result()
+        errors.update(fill_errors)
+    except Exception as e:
+        return None, None, str(e)
+    if "report" in errors:
+        return None, None, str(errors.get("report") or "Created doc but no documentId returned")
+    if "analysis" in docs and ("analysis" not in doc_ids or "analysis" in errors):
+        # report succeeded, analysis failed
+        return doc_ids["report"], None, str(errors.get("analysis") or "Created doc but no documentId returned")
+    return doc_ids["report"], doc_ids.get("analysis"), None
 
 
 def append_to_doc(document_id: str, markdown_text: str, credentials_path: str | None) -> str | None:
@@ -449,33 +759,26 @@ def append_to_doc(document_id: str, markdown_text: str, credentials_path: str |
     if not doc_id:
         return "Invalid Google Doc ID or URL. Paste the full doc URL or just the document ID."
     document_id = doc_id
-    if not HAS_GOOGLE:
+    if not _lazy_google():
         return "Google API libraries not installed"
     try:
-        creds = _get_creds(credentials_path)
+        service, _ = get_google_services(credentials_path)
     except Exception as e:
         return str(e)
-    if not creds:
-        return "No Google credentials (credentials.json not found or invalid)"
     try:
-        service = build("docs", "v1", credentials=creds)
-        # Insert at end: get current end index then insert text
-        doc = service.documents().get(documentId=document_id).execute()
-        end_index = doc.get("body", {}).get("content", [{}])[-1].get("endIndex", 1)
-        # endIndex is 1-based; we need to insert before the final newline
-        insert_index = max(1, end_index - 1)
+        # Insert at end of body (before the final newline) without fetching the doc for its end index
         plain = _markdown_to_plain(markdown_text)
         requests = [
             {
                 "insertText": {
-                    "location": {"index": insert_index},
+                    "endOfSegmentLocation": {},
                     "text": "\n\n---\n\n" + plain,
                 }
             }
         ]
-        service.documents().batchUpdate(
+        _execute(service.documents().batchUpdate(
             documentId=document_id, body={"requests": requests}
-        ).execute()
+        ))
         return None
     except HttpError as e:
         return str(e)
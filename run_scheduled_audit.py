@@ -6,11 +6,15 @@ Run this script daily at 10 AM via Windows Task Scheduler or cron.
 Requires: .env with GOOGLE_PAGESPEED_API_KEY, GEMINI_API_KEY, GOOGLE_CREDENTIALS_FILE.
 You must have run the Streamlit app once and signed in to Google so token_docs.json exists.
 """
+import hashlib
 import os
 import sys
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
 from urllib.parse import urlparse
 
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,6 +26,33 @@ from gemini_gap_analysis import get_gap_analysis
 # URL to audit (set in .env as SCHEDULED_AUDIT_URL or default)
 DEFAULT_URL = "https://tekspotedu.com/"
 URL = os.environ.get("SCHEDULED_AUDIT_URL", "").strip() or DEFAULT_URL
+# PSI_CACHE=1 reuses PageSpeed responses from the same UTC hour (re-runs, debugging); off by default
+PSI_CACHE = os.environ.get("PSI_CACHE") == "1"
+PSI_CACHE_DIR = Path(__file__).resolve().parent / ".cache" / "psi"
+
+
+def _psi_cache_path(url: str, strategy: str) -> Path:
+    url_hash = hashlib.sha256(url.encode()).hexdigest()[:16]
+    hour = datetime.now(timezone.utc).strftime("%Y%m%d%H")
+    return PSI_CACHE_DIR / f"{url_hash}_{strategy}_{hour}.json"
+
+
+def _fetch_pagespeed_cached(url: str, api_key: str, strategy: str) -> dict:
+    """fetch_pagespeed, served from / saved to the hourly on-disk cache when PSI_CACHE=1."""
+    if not PSI_CACHE:
+        return fetch_pagespeed(url, api_key, strategy=strategy)
+    path = _psi_cache_path(url, strategy)
+    try:
+        return orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        pass
+    data = fetch_pagespeed(url, api_key, strategy=strategy)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(orjson.dumps(data))
+    except OSError as e:
+        print(f"WARNING: Could not write PSI cache {path}: {e}", file=sys.stderr)
+    return data
 
 
 def main() -> int:
@@ -39,23 +70,29 @@ def main() -> int:
 
     print(f"Scheduled audit started for {URL} at {datetime.now().isoformat()}")
 
-    try:
-        print("Running PageSpeed (mobile)...")
-        psi_mobile = fetch_pagespeed(URL, pagespeed_key, strategy="mobile")
-        print("Running PageSpeed (desktop)...")
-        psi_desktop = fetch_pagespeed(URL, pagespeed_key, strategy="desktop")
-    except Exception as e:
-        print(f"ERROR: PageSpeed failed: {e}", file=sys.stderr)
-        return 1
-
+    netloc = urlparse(URL).netloc
     serper_data = None
-    actual_serper_query = urlparse(URL).netloc or URL
-    if serper_key:
-        try:
+    actual_serper_query = netloc or URL
+    # Mobile, desktop and SERP fetches are independent: run them concurrently (wall time = slowest call)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        print("Running PageSpeed (mobile + desktop)...")
+        mobile_future = executor.submit(_fetch_pagespeed_cached, URL, pagespeed_key, "mobile")
+        desktop_future = executor.submit(_fetch_pagespeed_cached, URL, pagespeed_key, "desktop")
+        serper_future = None
+        if serper_key:
             print("Fetching SERP data...")
-            serper_data = fetch_serper(actual_serper_query, serper_key)
-        except Exception:
-            pass
+            serper_future = executor.submit(fetch_serper, actual_serper_query, serper_key)
+        try:
+            psi_mobile = mobile_future.result()
+            psi_desktop = desktop_future.result()
+        except Exception as e:
+            print(f"ERROR: PageSpeed failed: {e}", file=sys.stderr)
+            return 1
+        if serper_future:
+            try:
+                serper_data = serper_future.result()
+            except Exception:
+                pass
 
     report_md = build_report(
         URL,
@@ -72,7 +109,7 @@ def main() -> int:
         if not gap_md:
             print(f"WARNING: Gap analysis failed: {gap_err}", file=sys.stderr)
 
-    domain = urlparse(URL).netloc or "report"
+    domain = netloc or "report"
     date_str = datetime.now().strftime("%Y-%m-%d")
     print("Creating Google Docs (report + gap analysis)...")
     report_doc_id, analysis_doc_id, export_err = create_report_and_analysis_docs(
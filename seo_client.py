@@ -2,42 +2,147 @@
 SEO report: Google PageSpeed Insights + optional Serper API.
 No RapidAPI dependency.
 """
+import asyncio
+import functools
+import io
+import itertools
+import random
 import re
 from typing import Any
+from urllib.parse import urlparse
 
+import aiohttp
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 PAGESPEED_URL = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
 SERPER_URL = "https://google.serper.dev/search"
+PAGESPEED_TIMEOUT = 90
+# Transient failures both PSI and Gemini recover from within seconds
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_TOTAL = 4
+RETRY_BACKOFF = 0.5
+RETRY_AFTER_MAX = 30.0
+# Only the categories build_report renders (each one appears under "Scores")
+PAGESPEED_CATEGORIES = ("performance", "accessibility", "best-practices", "seo")
+# Partial response: only the parts of lighthouseResult the report reads (drops loadingExperience,
+# fullPageScreenshot, i18n, timing, stackPacks, entities, ...)
+PAGESPEED_FIELDS = "lighthouseResult(categories,audits)"
+# PSI JSON compresses ~10x; br is decoded by urllib3 / aiohttp when the brotli package is installed
+PAGESPEED_HEADERS = {"Accept-Encoding": "gzip, br", "User-Agent": "seo-health-checker/1.0"}
+SERPER_TIMEOUT = 15
+# Lighthouse audits listed under "Core Web Vitals", in report order
+CORE_WEB_VITALS = ("first-contentful-paint", "largest-contentful-paint", "cumulative-layout-shift", "total-blocking-time")
+SECTION_RULE = "\n---\n"
+_RE_SCHEME = re.compile(r"^https?://", re.IGNORECASE)
+
+
+@functools.cache
+def http_session() -> requests.Session:
+    """
+    Process-wide requests.Session so repeated PageSpeed / Serper / Gemini calls reuse pooled
+    keep-alive connections instead of a new TCP + TLS handshake each time.
+    """
+    session = requests.Session()
+    # Jittered exponential backoff that honors Retry-After; the final response is returned
+    # (raise_on_status=False) so callers keep their own error extraction for terminal failures.
+    # Read timeouts are not retried (read=0): the server may still be working, and resending a
+    # slow Gemini POST would bill the generation again and multiply the 90 s wait.
+    retry = Retry(
+        total=RETRY_TOTAL,
+        read=0,
+        backoff_factor=RETRY_BACKOFF,
+        backoff_jitter=RETRY_BACKOFF,
+        backoff_max=RETRY_AFTER_MAX,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry))
+    return session
+
+
+def _retry_delay(attempt: int, retry_after: str | None) -> float:
+    """Seconds before retry number `attempt` (0-based): Retry-After if sent, else jittered backoff."""
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), RETRY_AFTER_MAX)
+        except ValueError:
+            pass
+    return min(RETRY_BACKOFF * (2 ** attempt) + random.uniform(0, RETRY_BACKOFF), RETRY_AFTER_MAX)
 
 
 def _normalize_url(url: str) -> str:
     url = url.strip()
-    if not re.match(r"^https?://", url, re.IGNORECASE):
+    if not _RE_SCHEME.match(url):
         url = "https://" + url
     return url
 
 
+def _pagespeed_params(url: str, api_key: str, strategy: str) -> list[tuple[str, str]]:
+    # PageSpeed API accepts multiple category parameters: ?category=performance&category=accessibility...
+    # A list of pairs is encoded the same way by both requests and aiohttp.
+    params = [("url", _normalize_url(url)), ("key", api_key), ("strategy", strategy)]
+    params += [("category", c) for c in PAGESPEED_CATEGORIES]
+    params.append(("fields", PAGESPEED_FIELDS))
+    return params
+
+
+# Base64 screenshot payloads (often 100–800KB each) that the report never renders
+_SCREENSHOT_AUDITS = ("screenshot-thumbnails", "final-screenshot", "full-page-screenshot")
+
+
+def _strip_screenshots(data: dict[str, Any]) -> dict[str, Any]:
+    """Drop embedded screenshots from a PSI response in place, before it is cached or stored."""
+    lh = data.get("lighthouseResult")
+    if isinstance(lh, dict):
+        lh.pop("fullPageScreenshot", None)
+        audits = lh.get("audits")
+        if isinstance(audits, dict):
+            for audit_id in _SCREENSHOT_AUDITS:
+                audits.pop(audit_id, None)
+    return data
+
+
+@functools.lru_cache(maxsize=256)
+def validate_url(url: str) -> str | None:
+    """
+    Normalize a user-entered URL (adds https:// when no scheme) and return it, or None if it
+    is obviously unusable, so no API quota is spent on it.
+    """
+    if not url or not url.strip():
+        return None
+    normalized = _normalize_url(url)
+    try:
+        parsed = urlparse(normalized)
+        hostname = parsed.hostname
+    except ValueError:
+        return None
+    if parsed.scheme not in ("http", "https") or not hostname:
+        return None
+    if any(c.isspace() for c in parsed.netloc) or (hostname != "localhost" and "." not in hostname):
+        return None
+    return normalized
+
+
 def fetch_pagespeed(url: str, api_key: str, strategy: str = "mobile") -> dict[str, Any]:
     """
     Run PageSpeed Insights for a URL.
     strategy: "mobile" or "desktop"
-    Returns raw API response (lighthouseResult, loadingExperience, etc.).
+    Returns the API response trimmed to lighthouseResult categories and audits (PAGESPEED_FIELDS).
     """
-    url = _normalize_url(url)
-    # PageSpeed API accepts multiple category parameters
-    # requests library will convert list to multiple query params: ?category=performance&category=accessibility...
-    params = {
-        "url": url,
-        "key": api_key,
-        "strategy": strategy,
-        "category": ["performance", "accessibility", "best-practices", "seo"],
-    }
+    params = _pagespeed_params(url, api_key, strategy)
     try:
-        response = requests.get(PAGESPEED_URL, params=params, timeout=90)
+        response = http_session().get(
+            PAGESPEED_URL, params=params, headers=PAGESPEED_HEADERS, timeout=PAGESPEED_TIMEOUT
+        )
         response.raise_for_status()
-        return response.json()
+        # orjson decodes the large Lighthouse tree several times faster than stdlib json
+        return _strip_screenshots(orjson.loads(response.content))
     except requests.exceptions.HTTPError as e:
         # Provide more detailed error information
         error_msg = f"PageSpeed API error: {e}"
@@ -46,6 +151,41 @@ def fetch_pagespeed(url: str, api_key: str, strategy: str = "mobile") -> dict[st
         raise Exception(error_msg) from e
 
 
+async def fetch_pagespeed_async(
+    session: aiohttp.ClientSession, url: str, api_key: str, strategy: str = "mobile"
+) -> dict[str, Any]:
+    """
+    Async variant of fetch_pagespeed on a shared aiohttp session, so mobile and
+    desktop runs (and Serper) can be awaited together instead of back-to-back.
+    """
+    params = _pagespeed_params(url, api_key, strategy)
+    timeout = aiohttp.ClientTimeout(total=PAGESPEED_TIMEOUT)
+    # aiohttp has no retry adapter, so mirror http_session()'s Retry policy here: retry
+    # 429/5xx and failed connects, never a timeout (the request may already be running)
+    for attempt in range(RETRY_TOTAL + 1):
+        try:
+            async with session.get(
+                PAGESPEED_URL, params=params, headers=PAGESPEED_HEADERS, timeout=timeout
+            ) as response:
+                if response.status in RETRY_STATUSES and attempt < RETRY_TOTAL:
+                    delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+                elif response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"PageSpeed API error: {response.status} {response.reason} - {text[:200]}")
+                else:
+                    return _strip_screenshots(orjson.loads(await response.read()))
+        except aiohttp.ClientConnectorError as e:
+            if attempt == RETRY_TOTAL:
+                raise Exception(f"PageSpeed API connection failed: {e}") from e
+            delay = _retry_delay(attempt, None)
+        except asyncio.TimeoutError as e:
+            # str() of aiohttp's timeout is empty; say what happened like the requests path did
+            raise Exception(f"PageSpeed API timed out (timeout={PAGESPEED_TIMEOUT}s)") from e
+        except aiohttp.ClientError as e:
+            raise Exception(f"PageSpeed API request failed: {e}") from e
+        await asyncio.sleep(delay)
+
+
 def fetch_serper(query: str, api_key: str, num: int = 10) -> dict[str, Any] | None:
     """
     Run Serper search for SERP data (organic results, people also ask).
@@ -54,11 +194,11 @@ def fetch_serper(query: str, api_key: str, num: int = 10) -> dict[str, Any] | No
     if not query.strip() or not api_key:
         return None
     try:
-        response = requests.post(
+        response = http_session().post(
             SERPER_URL,
             headers={"X-API-KEY": api_key, "Content-Type": "application/json"},
             json={"q": query.strip(), "num": num},
-            timeout=15,
+            timeout=SERPER_TIMEOUT,
         )
         response.raise_for_status()
         return response.json()
@@ -66,12 +206,44 @@ def fetch_serper(query: str, api_key: str, num: int = 10) -> dict[str, Any] | No
         return None
 
 
+async def fetch_serper_async(
+    session: aiohttp.ClientSession, query: str, api_key: str, num: int = 10
+) -> dict[str, Any] | None:
+    """
+    Async variant of fetch_serper. Same contract: None if key missing / request fails.
+    """
+    if not query.strip() or not api_key:
+        return None
+    try:
+        async with session.post(
+            SERPER_URL,
+            headers={"X-API-KEY": api_key, "Content-Type": "application/json"},
+            json={"q": query.strip(), "num": num},
+            timeout=aiohttp.ClientTimeout(total=SERPER_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            return await response.json()
+    except Exception:
+        return None
+
+
 def _score_pct(score: float | None) -> str:
     if score is None:
         return "—"
     return f"{round(score * 100)}%"
 
 
+# Indexed by how many of the 0.5 / 0.9 thresholds a score reaches
+_STATUS_GLYPHS = ("✖", "⚠", "✔")
+
+
+def _glyph(score: float | None) -> str:
+    """Pass / needs-work / fail mark for a Lighthouse score; unscored audits count as failing."""
+    if score is None:
+        return "✖"
+    return _STATUS_GLYPHS[(score >= 0.5) + (score >= 0.9)]
+
+
 def _format_audits(audits: dict[str, Any] | None) -> list[str]:
     if not audits:
         return []
@@ -85,70 +257,65 @@ def _format_audits(audits: dict[str, Any] | None) -> list[str]:
         if not title:
             continue
         if score is not None:
-            status = "✔" if score >= 0.9 else ("⚠" if score >= 0.5 else "✖")
-            lines.append(f"- {status} **{title}** {_score_pct(score)}" + (f" — {display}" if display else ""))
+            lines.append(f"- {_glyph(score)} **{title}** {_score_pct(score)}" + (f" — {display}" if display else ""))
         else:
             lines.append(f"- **{title}**" + (f" — {display}" if display else ""))
     return lines
 
 
 def _pagespeed_to_markdown(data: dict[str, Any], url: str, strategy: str) -> str:
-    parts = [
-        f"## PageSpeed Insights ({strategy})\n",
-        f"**URL:** {url}\n",
-    ]
+    buf = io.StringIO()
+    write = buf.write
+    write(f"## PageSpeed Insights ({strategy})\n**URL:** {url}\n")
     lh = data.get("lighthouseResult") or {}
     categories = lh.get("categories") or {}
     # Category scores
-    parts.append("### Scores\n")
+    write("### Scores\n")
     for cat_id, cat in categories.items():
         if isinstance(cat, dict) and "score" in cat:
             score = cat.get("score")
             title = (cat.get("title") or cat_id).replace("-", " ").title()
-            parts.append(f"- **{title}:** {_score_pct(score)}\n")
+            write(f"- **{title}:** {_score_pct(score)}\n")
     # Core Web Vitals from audits if present
     audits = lh.get("audits") or {}
-    cwv = ["first-contentful-paint", "largest-contentful-paint", "cumulative-layout-shift", "total-blocking-time"]
-    cwv_found = [a for a in cwv if a in audits]
+    cwv_found = [a for a in CORE_WEB_VITALS if a in audits]
     if cwv_found:
-        parts.append("\n### Core Web Vitals\n")
+        write("\n### Core Web Vitals\n")
         for aid in cwv_found:
             a = audits[aid]
             title = a.get("title", aid)
             display = a.get("displayValue") or ""
             score = a.get("score")
-            s = "✔" if score and score >= 0.9 else ("⚠" if score and score >= 0.5 else "✖")
-            parts.append(f"- {s} **{title}** {display}\n")
+            write(f"- {_glyph(score)} **{title}** {display}\n")
     # SEO audits
     if "seo" in categories and isinstance(categories["seo"], dict):
         seo_audit_ids = (categories["seo"].get("auditRefs") or [])
-        seo_ids = [r.get("id") for r in seo_audit_ids if r.get("id") in audits]
+        # Only the first 15 refs with a matching audit are rendered; stop scanning there
+        seo_ids = list(itertools.islice((aid for r in seo_audit_ids if (aid := r.get("id")) in audits), 15))
         if seo_ids:
-            parts.append("\n### SEO checks\n")
-            for aid in seo_ids[:15]:
+            write("\n### SEO checks\n")
+            for aid in seo_ids:
                 a = audits.get(aid)
                 if not a:
                     continue
                 title = a.get("title", aid)
                 score = a.get("score")
                 display = a.get("displayValue") or a.get("description") or ""
-                s = "✔" if score is not None and score >= 0.9 else ("⚠" if score is not None and score >= 0.5 else "✖")
-                parts.append(f"- {s} **{title}**" + (f" — {display}" if display else "") + "\n")
+                write(f"- {_glyph(score)} **{title}**" + (f" — {display}" if display else "") + "\n")
     # Accessibility highlights
     if "accessibility" in categories:
         acc_audit_ids = (categories["accessibility"].get("auditRefs") or []) if isinstance(categories["accessibility"], dict) else []
-        acc_ids = [r.get("id") for r in acc_audit_ids if r.get("id") in audits][:12]
+        acc_ids = list(itertools.islice((aid for r in acc_audit_ids if (aid := r.get("id")) in audits), 12))
         if acc_ids:
-            parts.append("\n### Accessibility\n")
+            write("\n### Accessibility\n")
             for aid in acc_ids:
                 a = audits.get(aid)
                 if not a:
                     continue
                 title = a.get("title", aid)
                 score = a.get("score")
-                s = "✔" if score is not None and score >= 0.9 else ("⚠" if score is not None and score >= 0.5 else "✖")
-                parts.append(f"- {s} **{title}**\n")
-    return "".join(parts)
+                write(f"- {_glyph(score)} **{title}**\n")
+    return buf.getvalue()
 
 
 def build_report(
@@ -162,34 +329,31 @@ def build_report(
     Combine PageSpeed (and optional Serper) data into one Markdown report.
     """
     url = _normalize_url(url)
-    parts = [
-        "# SEO & Performance Report\n",
-        f"**Site:** {url}\n",
-        "---\n",
-    ]
+    buf = io.StringIO()
+    write = buf.write
+    write(f"# SEO & Performance Report\n**Site:** {url}\n---\n")
     if pagespeed_mobile:
-        parts.append(_pagespeed_to_markdown(pagespeed_mobile, url, "Mobile"))
-        parts.append("\n---\n")
+        write(_pagespeed_to_markdown(pagespeed_mobile, url, "Mobile"))
+        write(SECTION_RULE)
     if pagespeed_desktop:
-        parts.append(_pagespeed_to_markdown(pagespeed_desktop, url, "Desktop"))
-        parts.append("\n---\n")
+        write(_pagespeed_to_markdown(pagespeed_desktop, url, "Desktop"))
+        write(SECTION_RULE)
     if serper_data and serper_query:
-        parts.append("## SERP context\n")
-        parts.append(f"*Query:* \"{serper_query}\"\n\n")
+        write(f"## SERP context\n*Query:* \"{serper_query}\"\n\n")
         organic = serper_data.get("organic") or []
         if organic:
-            parts.append("### Top results\n")
+            write("### Top results\n")
             for i, o in enumerate(organic[:10], 1):
                 title = o.get("title") or ""
                 link = o.get("link") or ""
                 snippet = o.get("snippet") or ""
-                parts.append(f"{i}. **{title}**  \n   {link}  \n   {snippet}\n\n")
+                write(f"{i}. **{title}**  \n   {link}  \n   {snippet}\n\n")
         people_ask = serper_data.get("peopleAlsoAsk") or []
         if people_ask:
-            parts.append("### People also ask\n")
+            write("### People also ask\n")
             for pa in people_ask[:5]:
                 q = pa.get("question") or ""
                 snippet = pa.get("snippet") or ""
                 if q:
-                    parts.append(f"- **{q}**  \n  {snippet}\n\n")
-    return "".join(parts).strip()
+                    write(f"- **{q}**  \n  {snippet}\n\n")
+    return buf.getvalue().strip()